@@ -0,0 +1,94 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Cython inner loop for LSystem.iterate over ASCII single-char rule sets.
+
+Same table layout as the byte-table path in lsystem.py: per-byte
+production slices into flat cumulative-probability / successor arrays.
+The state stays in raw bytes the whole time, so the loop is pointer
+arithmetic with no Python object allocation per character.
+
+Optional: build in place with
+
+    cythonize -i algorithm/_lsystem_core.pyx
+
+and LSystem picks it up automatically; without the compiled module the
+pure-Python paths are used.
+"""
+
+
+cdef class StepperC:
+    cdef int prod_start[256]
+    cdef int prod_count[256]
+    cdef double[::1] cum_probs
+    cdef int[::1] succ_start
+    cdef int[::1] succ_len
+    cdef unsigned char[::1] succ_flat
+    cdef long long[::1] rule_idx
+    cdef int max_succ_len
+
+    def __init__(
+        self,
+        prod_start,
+        prod_count,
+        cum_probs,
+        succ_start,
+        succ_len,
+        succ_flat,
+        rule_idx,
+        max_succ_len,
+    ):
+        cdef int i
+        for i in range(256):
+            self.prod_start[i] = prod_start[i]
+            self.prod_count[i] = prod_count[i]
+        self.cum_probs = cum_probs
+        self.succ_start = succ_start
+        self.succ_len = succ_len
+        self.succ_flat = succ_flat
+        self.rule_idx = rule_idx
+        self.max_succ_len = max_succ_len
+
+    cpdef bytes step(
+        self,
+        const unsigned char[::1] state,
+        const double[::1] randoms,
+        long long[::1] counts,
+    ):
+        """One derivation pass; mirrors the semantics of the Python paths
+        (identity on a miss or when the draw falls past the last entry)."""
+        cdef Py_ssize_t n = state.shape[0]
+        cdef bytearray out_buf = bytearray(n * self.max_succ_len)
+        cdef unsigned char[::1] out = out_buf
+        cdef Py_ssize_t pos = 0
+        cdef Py_ssize_t i
+        cdef int c, count, base, chosen, k, start
+        cdef double r
+
+        for i in range(n):
+            c = state[i]
+            count = self.prod_count[c]
+
+            if count == 0:
+                out[pos] = c
+                pos += 1
+                continue
+
+            r = randoms[i]
+            base = self.prod_start[c]
+            chosen = -1
+            for k in range(count):
+                if r <= self.cum_probs[base + k]:
+                    chosen = base + k
+                    break
+
+            if chosen == -1:
+                out[pos] = c
+                pos += 1
+            else:
+                counts[self.rule_idx[chosen]] += 1
+                start = self.succ_start[chosen]
+                for k in range(self.succ_len[chosen]):
+                    out[pos] = self.succ_flat[start + k]
+                    pos += 1
+
+        return bytes(out_buf[:pos])
@@ -1,5 +1,9 @@
 import sys
 import os
+import random
+import re
+from bisect import bisect_left
+
 import numpy as np
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -7,120 +11,597 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.axiom import Axiom
 from utils.rule import Rule
 from utils.constants import BASIC_EXAMPLE, TREE_EXAMPLE
+from algorithm.lsystem_numba import HAVE_NUMBA, step_codes
+
+# Compiled Cython stepper, if the extension has been built (see
+# algorithm/_lsystem_core.pyx); otherwise the pure-Python paths are used.
+try:
+    from algorithm._lsystem_core import StepperC
+except ImportError:
+    StepperC = None
+
+# A "[" opening a branch that immediately rotates away from the parent.
+_BRANCH_RE = re.compile(r"\[[+\-&^/\\|]")
 
 class LSystem:
     def __init__(self, axiom: Axiom, rule: Rule) -> None:
         self.axiom = axiom
         self.rule = rule
         self.state = axiom.initial_state
-        self.matched_rules = {} # Dictionary to help keep track of rule matches
-        for r in rule.list:
-            rule_key = f"{r['symbol']} -> {r['new_symbol']}"
-            self.matched_rules[rule_key] = 0
-        
+
+        # Keep track of rule matches in a flat counts array indexed by rule
+        # id; the "symbol -> new_symbol" keys are only built on demand in
+        # get_rule_statistics. An array-index increment is much cheaper than
+        # hashing an f-string key on every successful match.
+        self._rule_keys = [f"{r['symbol']} -> {r['new_symbol']}" for r in rule.list]
+        self.rule_counts = np.zeros(len(rule.list), dtype=np.int64)
+
+        self._build_matcher()
+
+    def _build_matcher(self):
+        """
+        Compile the rule predecessors into a trie so matching at a string
+        position is one walk down the trie instead of a scan over every rule.
+
+        Each trie node is a dict mapping the next character to a child node;
+        the "" key on a node marks the predecessor that ends there.
+
+        Also precompute, per predecessor, the cumulative probabilities of its
+        productions so sampling is one random draw + bisect instead of
+        re-accumulating chances on every call. Zero-chance rules are left out
+        of the sampling arrays since they can never be picked.
+
+        The per-predecessor tables are parallel tuples (cumulative
+        probabilities, successor strings, rule ids) rather than lists of
+        rule dicts, so the hot loops index plain tuples instead of paying a
+        dict hash per field access.
+        """
+        self._trie = {}
+        rules_by_pred = {}
+
+        for rule_idx, r in enumerate(self.rule.list):
+            node = self._trie
+            for char in r["symbol"]:
+                node = node.setdefault(char, {})
+            node[""] = r["symbol"]
+
+            if r["chance"] != 0:
+                rules_by_pred.setdefault(r["symbol"], []).append(
+                    (r["chance"], r["new_symbol"], rule_idx)
+                )
+
+        # Order each predecessor's productions by descending chance before
+        # accumulating, so the sampling comparisons (bisect here, if/elif
+        # chains in the generated stepper) hit the most likely production
+        # first. The sort is stable, so equal-chance rules keep their
+        # declaration order; the sampled distribution is unchanged.
+        self.rules_by_pred = {}
+        for pred, entries in rules_by_pred.items():
+            entries.sort(key=lambda entry: -entry[0])
+
+            cum_probs = []
+            added_prob = 0
+            for chance, _, _ in entries:
+                added_prob += chance
+                cum_probs.append(added_prob)
+
+            self.rules_by_pred[pred] = (
+                tuple(cum_probs),
+                tuple(new_symbol for _, new_symbol, _ in entries),
+                tuple(rule_idx for _, _, rule_idx in entries),
+            )
+
+        # If every predecessor is a single character with exactly one
+        # production that always fires, a whole iteration collapses to one
+        # str.translate call (a single C-level pass, no Python loop).
+        self._translate_table = None
+        if all(len(r["symbol"]) == 1 for r in self.rule.list):
+            deterministic = all(
+                len(new_symbols) == 1 and cum_probs[-1] >= 1
+                for cum_probs, new_symbols, _ in self.rules_by_pred.values()
+            )
+            if deterministic:
+                self._translate_table = {
+                    ord(pred): new_symbols[0]
+                    for pred, (_, new_symbols, _) in self.rules_by_pred.items()
+                }
+                # Compose each production with one more derivation step so a
+                # pair of iterations becomes a single translate pass. Sound
+                # here because rewriting is per-character; stochastic and
+                # multi-char systems keep stepping one iteration at a time.
+                self._translate_table_2 = {
+                    key: new_symbol.translate(self._translate_table)
+                    for key, new_symbol in self._translate_table.items()
+                }
+
+        # Deterministic systems with multi-character predecessors (SETH_TREE)
+        # can't use the translate table, but a compiled alternation pattern
+        # does the whole rewrite in one C-level re.sub pass. Sorting the
+        # predecessors longest-first preserves longest-match priority.
+        self._regex_rewrite = None
+        if (
+            self._translate_table is None
+            and self.rules_by_pred
+            and all(
+                len(new_symbols) == 1 and cum_probs[-1] >= 1
+                for cum_probs, new_symbols, _ in self.rules_by_pred.values()
+            )
+        ):
+            preds = sorted(self.rules_by_pred, key=len, reverse=True)
+            pattern = re.compile("|".join(re.escape(pred) for pred in preds))
+            replacements = {
+                pred: (
+                    self.rules_by_pred[pred][1][0],
+                    self.rules_by_pred[pred][2][0],
+                )
+                for pred in preds
+            }
+            self._regex_rewrite = (pattern, replacements)
+
+        # With only single-character predecessors the longest-match walk is
+        # pointless: every position resolves with one dict lookup. The
+        # rules_by_pred table is already keyed by character in that case.
+        self._single_char = all(len(r["symbol"]) == 1 for r in self.rule.list)
+
+        # Even in mixed rule sets, most characters cannot start a multi-char
+        # predecessor; remember which ones can so the general path only
+        # walks the trie for those and handles the rest with a dict lookup.
+        self._multi_starts = frozenset(
+            r["symbol"][0] for r in self.rule.list if len(r["symbol"]) > 1
+        )
+
+        # When the alphabet is pure ASCII (BUSH_3D and PLANT_SYSTEM leaves
+        # use non-ASCII symbols, ZONO_TREE does not), the single-char path
+        # can accumulate raw bytes in a bytearray instead of a list of many
+        # small string objects. Indexed by byte value for O(1) dispatch;
+        # successors are pre-encoded.
+        self._byte_table = None
+        rule_chars = "".join(
+            r["symbol"] + r["new_symbol"] for r in self.rule.list
+        )
+        if self._single_char and (rule_chars + self.axiom.initial_state).isascii():
+            self._byte_table = [None] * 256
+            for pred, (cum_probs, new_symbols, rule_idxs) in self.rules_by_pred.items():
+                self._byte_table[ord(pred)] = (
+                    cum_probs,
+                    tuple(s.encode("ascii") for s in new_symbols),
+                    rule_idxs,
+                )
+
+        # The Cython extension, when built, runs the same byte-table layout
+        # as a compiled loop and takes priority over every Python stepper.
+        self._cython_stepper = None
+        if StepperC is not None and self._byte_table is not None:
+            self._cython_stepper = self._build_cython_stepper()
+
+        # For single-char stochastic systems, go one step further and
+        # partial-evaluate the matcher: generate a stepper with the rule set
+        # inlined as literal if/elif branches, so the inner loop is
+        # straight-line bytecode with no table lookups at all.
+        self._compiled_step = None
+        if (
+            self._single_char
+            and self._translate_table is None
+            and self.rules_by_pred
+        ):
+            self._compiled_step = self._compile_stepper()
+
+        # Stochastic single-char systems can run in the Numba kernel when
+        # numba is installed: encode the alphabet as uint8 and flatten the
+        # production tables into contiguous arrays for the jitted loop.
+        self._numba_tables = None
+        if HAVE_NUMBA and self._translate_table is None and self._single_char:
+            self._numba_tables = self._build_numba_tables()
+
+    def _build_cython_stepper(self):
+        """Flatten rules_by_pred into the per-byte arrays StepperC expects."""
+        prod_start = [0] * 256
+        prod_count = [0] * 256
+        cum_probs = []
+        succ_start = []
+        succ_len = []
+        succ_flat = bytearray()
+        prod_rule_idx = []
+
+        for pred, (pred_cum, new_symbols, rule_idxs) in self.rules_by_pred.items():
+            prod_start[ord(pred)] = len(prod_rule_idx)
+            prod_count[ord(pred)] = len(new_symbols)
+            cum_probs.extend(pred_cum)
+            for new_symbol, rule_idx in zip(new_symbols, rule_idxs):
+                encoded = new_symbol.encode("ascii")
+                succ_start.append(len(succ_flat))
+                succ_len.append(len(encoded))
+                succ_flat += encoded
+                prod_rule_idx.append(rule_idx)
+
+        return StepperC(
+            prod_start,
+            prod_count,
+            np.array(cum_probs, dtype=np.float64),
+            np.array(succ_start, dtype=np.intc),
+            np.array(succ_len, dtype=np.intc),
+            np.frombuffer(bytes(succ_flat), dtype=np.uint8).copy(),
+            np.array(prod_rule_idx, dtype=np.longlong),
+            max([1] + succ_len),
+        )
+
+    def _iterate_cython(self, iterations: int) -> None:
+        state_bytes = self.state.encode("ascii")
+
+        for i in range(0, iterations):
+            randoms = np.random.random(len(state_bytes))
+            state_bytes = self._cython_stepper.step(
+                state_bytes, randoms, self.rule_counts
+            )
+
+        self.state = state_bytes.decode("ascii")
+
+    def _compile_stepper(self):
+        """
+        Codegen a step function specialized to this rule set. Cumulative
+        probabilities, successor literals and rule ids are inlined, and
+        always-firing productions skip the random draw entirely (the draws
+        are positional, so skipping one does not shift the others).
+        """
+        lines = [
+            "def _step(state, randoms, rule_counts):",
+            "    chunks = []",
+            "    append = chunks.append",
+            "    for i, c in enumerate(state):",
+        ]
+
+        branch = "if"
+        for pred, (cum_probs, new_symbols, rule_idxs) in self.rules_by_pred.items():
+            lines.append(f"        {branch} c == {pred!r}:")
+            branch = "elif"
+
+            if len(new_symbols) == 1 and cum_probs[-1] >= 1:
+                lines.append(f"            rule_counts[{rule_idxs[0]}] += 1")
+                lines.append(f"            append({new_symbols[0]!r})")
+                continue
+
+            lines.append("            r = randoms[i]")
+            test = "if"
+            for cum, new_symbol, rule_idx in zip(cum_probs, new_symbols, rule_idxs):
+                lines.append(f"            {test} r <= {cum!r}:")
+                test = "elif"
+                lines.append(f"                rule_counts[{rule_idx}] += 1")
+                lines.append(f"                append({new_symbol!r})")
+            lines.append("            else:")
+            lines.append("                append(c)")
+
+        lines.append("        else:")
+        lines.append("            append(c)")
+        lines.append("    return ''.join(chunks)")
+
+        namespace = {}
+        exec(compile("\n".join(lines), "<lsystem codegen>", "exec"), namespace)
+        return namespace["_step"]
+
+    def _build_numba_tables(self):
+        alphabet = set(self.axiom.initial_state)
+        for r in self.rule.list:
+            alphabet |= set(r["symbol"]) | set(r["new_symbol"])
+        alphabet = sorted(alphabet)
+        code_of = {char: i for i, char in enumerate(alphabet)}
+
+        num_codes = len(alphabet)
+        prod_start = np.zeros(num_codes, dtype=np.int32)
+        prod_count = np.zeros(num_codes, dtype=np.int32)
+        cum_probs = []
+        succ_start = []
+        succ_len = []
+        succ_flat = []
+        prod_rule_idx = []
+
+        for pred, (pred_cum, new_symbols, rule_idxs) in self.rules_by_pred.items():
+            prod_start[code_of[pred]] = len(prod_rule_idx)
+            prod_count[code_of[pred]] = len(new_symbols)
+            cum_probs.extend(pred_cum)
+            for new_symbol, rule_idx in zip(new_symbols, rule_idxs):
+                succ_start.append(len(succ_flat))
+                succ_len.append(len(new_symbol))
+                succ_flat.extend(code_of[char] for char in new_symbol)
+                prod_rule_idx.append(rule_idx)
+
+        return {
+            "alphabet": alphabet,
+            "code_of": code_of,
+            "prod_start": prod_start,
+            "prod_count": prod_count,
+            "cum_probs": np.array(cum_probs, dtype=np.float64),
+            "succ_start": np.array(succ_start, dtype=np.int32),
+            "succ_len": np.array(succ_len, dtype=np.int32),
+            "succ_flat": np.array(succ_flat, dtype=np.uint8),
+            "prod_rule_idx": np.array(prod_rule_idx, dtype=np.int64),
+            "max_succ_len": max([1] + succ_len),
+        }
+
+    def _longest_match(self, initial_state: str, current_index: int):
+        """Walk the trie and return the longest predecessor matching at
+        current_index, or None if nothing matches."""
+        longest_pred = None
+        node = self._trie
+
+        for i in range(current_index, len(initial_state)):
+            node = node.get(initial_state[i])
+            if node is None:
+                break
+            if "" in node:
+                longest_pred = node[""]
+
+        return longest_pred
+
     def remove_symbol(self, symbol: str):
-        self.state = self.state.replace(symbol, '')
+        # translate drops every character of the symbol in one C-level pass,
+        # so removing several symbols is still a single scan.
+        self.state = self.state.translate({ord(char): None for char in symbol})
                 
-    def match_rule(self, rule: Rule, initial_state: str, current_index: int):
-        valid_outputs = []
-        chance_limit = np.random.uniform(0, 1)
-        added_prob = 0
-
-        for i in range(0, len(rule.list)):
-            if current_index <= len(initial_state) - len(rule.list[i]["symbol"]) and (
-                initial_state[
-                    current_index : (current_index + len(rule.list[i]["symbol"]))
-                ]
-                == rule.list[i]["symbol"]
-            ):
-                valid_outputs.append(rule.list[i])
+    def match_rule(self, rule: Rule, initial_state: str, current_index: int, chance_limit: float):
+        char = initial_state[current_index]
+
+        if char in self._multi_starts:
+            longest_pred = self._longest_match(initial_state, current_index)
+        else:
+            # Only a single-char predecessor (or nothing) can match here.
+            longest_pred = char if char in self.rules_by_pred else None
 
         # If no rules matched at all, the character is unchanged.
-        if not valid_outputs:
-            return 1, initial_state[current_index]
+        if longest_pred is None:
+            return 1, char
 
-        # First, find the length of the longest symbol among all matches.
-        longest_symbol_len = len(max(valid_outputs, key=lambda r: len(r["symbol"]))["symbol"])
+        if longest_pred in self.rules_by_pred:
+            cum_probs, new_symbols, rule_idxs = self.rules_by_pred[longest_pred]
 
-        # Then, filter the list to only include rules for that longest symbol.
-        prioritized_rules = [
-            r for r in valid_outputs if len(r["symbol"]) == longest_symbol_len
-        ]
-        
-        chance_limit = np.random.uniform(0, 1)
-        added_prob = 0
-
-        for i in range(0, len(prioritized_rules)):
-            current_chance = prioritized_rules[i]["chance"]
-            if current_chance != 0:
-                added_prob += current_chance
-                if chance_limit <= added_prob:
-                    rule_key = f"{prioritized_rules[i]['symbol']} -> {prioritized_rules[i]['new_symbol']}"
-                    self.matched_rules[rule_key] += 1
-                    return len(prioritized_rules[i]["symbol"]), prioritized_rules[i]["new_symbol"]
+            idx = bisect_left(cum_probs, chance_limit)
+            if idx < len(new_symbols):
+                self.rule_counts[rule_idxs[idx]] += 1
+                return len(longest_pred), new_symbols[idx]
 
         # If no probabilistic rule was chosen, return the original (longest) matched symbol.
-        return longest_symbol_len, initial_state[current_index : current_index + longest_symbol_len]
+        return len(longest_pred), longest_pred
 
     def iterate(self, iterations: int) -> None:
-        def step(input_state: str, rule: Rule) -> str:
-            new_state = ""
+        if self._translate_table is not None:
+            self._iterate_translate(iterations)
+            return
+
+        if self._regex_rewrite is not None:
+            self._iterate_regex(iterations)
+            return
+
+        if self._numba_tables is not None and self._iterate_numba(iterations):
+            return
+
+        if self._single_char:
+            self._iterate_single(iterations)
+            return
+
+        def step(input_state: str, rule: Rule, randoms: list[float]) -> str:
+            # Collect replacement chunks and join once at the end. String +=
+            # copies the whole buffer every time, which is quadratic in the
+            # output length for deep iterations.
+            chunks = []
             i = 0
-            
+
             while i < len(input_state):
-                old_symbol_length, new_symbol = self.match_rule(rule, input_state, i)
-                new_state += new_symbol
+                old_symbol_length, new_symbol = self.match_rule(
+                    rule, input_state, i, randoms[i]
+                )
+                chunks.append(new_symbol)
                 i += old_symbol_length
 
-            return new_state
+            return "".join(chunks)
+
+        new_state = self.state
+
+        for i in range(0, iterations):
+            # Draw all the uniforms for this pass in one vectorized call
+            # instead of paying a Python->C round trip per character.
+            randoms = np.random.random(len(new_state)).tolist()
+            new_state = step(new_state, self.rule, randoms)
+
+        self.state = new_state
+
+    def _iterate_numba(self, iterations: int) -> bool:
+        """Run the derivation in the jitted uint8 kernel. Returns False if
+        the current state has characters outside the compiled alphabet, in
+        which case the caller falls back to the Python path."""
+        tables = self._numba_tables
+        code_of = tables["code_of"]
+
+        try:
+            codes = np.array([code_of[char] for char in self.state], dtype=np.uint8)
+        except KeyError:
+            return False
+
+        counts = np.zeros(len(tables["prod_rule_idx"]), dtype=np.int64)
+
+        for i in range(0, iterations):
+            randoms = np.random.random(codes.shape[0])
+            out = np.empty(codes.shape[0] * tables["max_succ_len"], dtype=np.uint8)
+            written = step_codes(
+                codes,
+                randoms,
+                tables["prod_start"],
+                tables["prod_count"],
+                tables["cum_probs"],
+                tables["succ_start"],
+                tables["succ_len"],
+                tables["succ_flat"],
+                counts,
+                out,
+            )
+            codes = out[:written].copy()
+
+        alphabet = tables["alphabet"]
+        self.state = "".join(alphabet[c] for c in codes)
+
+        np.add.at(self.rule_counts, tables["prod_rule_idx"], counts)
+
+        return True
+
+    def _iterate_regex(self, iterations: int) -> None:
+        """Fast path for deterministic rule sets with multi-character
+        predecessors: one compiled re.sub pass per iteration."""
+        pattern, replacements = self._regex_rewrite
+        rule_counts = self.rule_counts
+
+        def replace(match):
+            new_symbol, rule_idx = replacements[match.group()]
+            rule_counts[rule_idx] += 1
+            return new_symbol
+
+        new_state = self.state
+
+        for i in range(0, iterations):
+            new_state = pattern.sub(replace, new_state)
+
+        self.state = new_state
+
+    def _iterate_single(self, iterations: int) -> None:
+        """Fast path for single-character predecessors: one dict lookup and
+        one bisect per character, no trie walk."""
+        if self._cython_stepper is not None:
+            self._iterate_cython(iterations)
+            return
+
+        if self._compiled_step is not None:
+            compiled_step = self._compiled_step
+            rule_counts = self.rule_counts
+            new_state = self.state
+
+            for i in range(0, iterations):
+                randoms = np.random.random(len(new_state)).tolist()
+                new_state = compiled_step(new_state, randoms, rule_counts)
+
+            self.state = new_state
+            return
 
+        if self._byte_table is not None:
+            self._iterate_single_bytes(iterations)
+            return
+
+        rules_by_pred = self.rules_by_pred
+        rule_counts = self.rule_counts
         new_state = self.state
 
         for i in range(0, iterations):
-            new_state = step(new_state, self.rule)
+            randoms = np.random.random(len(new_state)).tolist()
+            chunks = []
+
+            for j, char in enumerate(new_state):
+                entry = rules_by_pred.get(char)
+                if entry is None:
+                    chunks.append(char)
+                    continue
+
+                cum_probs, new_symbols, rule_idxs = entry
+                idx = bisect_left(cum_probs, randoms[j])
+                if idx < len(new_symbols):
+                    rule_counts[rule_idxs[idx]] += 1
+                    chunks.append(new_symbols[idx])
+                else:
+                    chunks.append(char)
+
+            new_state = "".join(chunks)
 
         self.state = new_state
-        
+
+    def _iterate_single_bytes(self, iterations: int) -> None:
+        """ASCII variant of the single-character path: the state lives in a
+        bytearray and successors are appended pre-encoded, avoiding the
+        per-chunk string objects and the final join pass."""
+        byte_table = self._byte_table
+        rule_counts = self.rule_counts
+        state_bytes = self.state.encode("ascii")
+
+        for i in range(0, iterations):
+            randoms = np.random.random(len(state_bytes)).tolist()
+            buffer = bytearray()
+
+            for j, byte in enumerate(state_bytes):
+                entry = byte_table[byte]
+                if entry is None:
+                    buffer.append(byte)
+                    continue
+
+                cum_probs, encoded, rule_idxs = entry
+                idx = bisect_left(cum_probs, randoms[j])
+                if idx < len(encoded):
+                    rule_counts[rule_idxs[idx]] += 1
+                    buffer += encoded[idx]
+                else:
+                    buffer.append(byte)
+
+            state_bytes = bytes(buffer)
+
+        self.state = state_bytes.decode("ascii")
+
+    def _iterate_translate(self, iterations: int) -> None:
+        """Fast path for fully deterministic single-character rule sets.
+        Iterations are applied two at a time with the composed table; the
+        intermediate strings are never materialized, so the per-iteration
+        statistics are tracked algebraically instead."""
+        preds = list(self.rules_by_pred)
+        pred_counts = {pred: self.state.count(pred) for pred in preds}
+
+        # How many of each predecessor one application of pred's production
+        # introduces; predecessor occurrences themselves are always consumed.
+        occurrences = {
+            pred: {
+                other: self.rules_by_pred[pred][1][0].count(other)
+                for other in preds
+            }
+            for pred in preds
+        }
+
+        for i in range(0, iterations):
+            # Every occurrence of a predecessor is one application of its
+            # (only) production.
+            for pred in preds:
+                self.rule_counts[self.rules_by_pred[pred][2][0]] += pred_counts[pred]
+
+            pred_counts = {
+                other: sum(
+                    pred_counts[pred] * occurrences[pred][other] for pred in preds
+                )
+                for other in preds
+            }
+
+        new_state = self.state
+
+        while iterations >= 2:
+            new_state = new_state.translate(self._translate_table_2)
+            iterations -= 2
+        if iterations:
+            new_state = new_state.translate(self._translate_table)
+
+        self.state = new_state
+
     def get_rule_statistics(self) -> list[str | int]:
         # print("\nRule application statistics:")
         # print("---------------------------")
-        
-        list = []
-        
-        for rule_str, count in self.matched_rules.items():
-            list.append([f"{rule_str}", count])
-            
-        return list
-        
+
+        return [
+            [rule_key, int(count)]
+            for rule_key, count in zip(self._rule_keys, self.rule_counts)
+        ]
+
         # print("---------------------------")
 
     def estimate_branch_groups(self, string=None):
         """
         Estimate branch groups using a simple bracket count.
-        
+
         Returns number of estimated groups
         """
         if string is None:
             string = self.state
-            
-        rotation_chars = set(["+", "-", "&", "^", "/", "\\", "|"])
-        
-        i = 0
-        count = 0
-        
-        while i < len(string) - 1:
-            if(string[i] == "[" and string[i+1] in rotation_chars):
-                count += 1
-            i += 1
-        
-        bracket_count = string.count("[")
-        
-        
-        # Estimate groups as: 
-        # 1 (initial trunk) + number of branch points
-        estimated_groups = bracket_count + 1
-        
-        return count
+
+        # One compiled-regex scan for "[" followed by a rotation character,
+        # instead of indexing the string position by position in Python.
+        return len(_BRANCH_RE.findall(string))
 
 
 if __name__ == "__main__":
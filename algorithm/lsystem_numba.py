@@ -0,0 +1,84 @@
+"""
+Optional Numba-compiled inner loop for LSystem.iterate.
+
+The rewrite step is a character-level state machine, which is exactly the
+kind of tight loop Numba handles well. The alphabet is encoded as uint8
+codes so the whole pass runs over contiguous numpy arrays with no Python
+object traffic. If numba is not installed, HAVE_NUMBA is False and
+LSystem falls back to the pure-Python paths.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # No-op decorator so the module still imports without numba.
+        def wrap(func):
+            return func
+
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True)
+def step_codes(
+    state_codes,
+    randoms,
+    prod_start,
+    prod_count,
+    cum_probs,
+    succ_start,
+    succ_len,
+    succ_flat,
+    counts,
+    out,
+):
+    """
+    One derivation pass over a uint8-coded state.
+
+    For each input code: no productions -> copy the code through; otherwise
+    pick a production by scanning its cumulative-probability slice against
+    the pre-drawn uniform for this position (identity if the draw falls past
+    the last entry), and copy the flattened successor codes into `out`.
+
+    Returns the number of codes written; `out` must be preallocated to
+    len(state_codes) * max successor length.
+    """
+    pos = 0
+
+    for i in range(state_codes.shape[0]):
+        c = state_codes[i]
+        n = prod_count[c]
+
+        if n == 0:
+            out[pos] = c
+            pos += 1
+            continue
+
+        r = randoms[i]
+        base = prod_start[c]
+        chosen = -1
+        for k in range(n):
+            if r <= cum_probs[base + k]:
+                chosen = base + k
+                break
+
+        if chosen == -1:
+            # No probabilistic rule fired; the symbol is unchanged.
+            out[pos] = c
+            pos += 1
+        else:
+            counts[chosen] += 1
+            s = succ_start[chosen]
+            for k in range(succ_len[chosen]):
+                out[pos] = succ_flat[s + k]
+                pos += 1
+
+    return pos
@@ -3,6 +3,7 @@ import os
 import sys
 from scipy.spatial.transform import Rotation
 import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -275,19 +276,24 @@ class LSystemTree:
         fig = plt.figure(figsize=figsize)
         ax = fig.add_subplot(111, projection="3d")
 
-        all_points = [np.array([0.0, 0.0, 0.0])]
-        for start, end, btype, diameter, color in self.branches:
-            # Use diameter to set linewidth (with a minimum width)
-            linewidth = max(0.5, diameter * 2.0)
-            ax.plot(
-                *zip(start, end),
-                color=branch_colors.get(btype, "gray"),
-                linewidth=linewidth,
-            )
-            all_points.extend([start, end])
-
-        # Set plot limits to create a bounding box
-        pts = np.array(all_points)
+        # Convert the branch list to contiguous arrays once and draw a
+        # single Line3DCollection instead of one ax.plot (and one
+        # np.array conversion) per branch.
+        starts = np.asarray([b[0] for b in self.branches], dtype=np.float32)
+        ends = np.asarray([b[1] for b in self.branches], dtype=np.float32)
+        diameters = np.asarray([b[3] for b in self.branches], dtype=np.float32)
+        segments = np.stack([starts, ends], axis=1)
+        # Use diameter to set linewidth (with a minimum width)
+        linewidths = np.maximum(0.5, diameters * 2.0)
+        colors = [branch_colors.get(b[2], "gray") for b in self.branches]
+
+        ax.add_collection3d(
+            Line3DCollection(segments, colors=colors, linewidths=linewidths)
+        )
+
+        # Set plot limits to create a bounding box (keep the origin in it,
+        # as before)
+        pts = np.vstack([segments.reshape(-1, 3), np.zeros((1, 3), dtype=np.float32)])
         max_range = (pts.max(axis=0) - pts.min(axis=0)).max() / 2.0
         mid = (pts.max(axis=0) + pts.min(axis=0)) / 2.0
         ax.set_xlim(mid[0] - max_range, mid[0] + max_range)
@@ -326,8 +332,6 @@ class LSystemTree:
         fig = plt.figure(figsize=figsize)
         ax = fig.add_subplot(111, projection="3d")
 
-        all_points = [np.array([0.0, 0.0, 0.0])]
-
         # Color mapping for branch colors
         branch_color_map = {
             'G': 'green',
@@ -349,26 +353,33 @@ class LSystemTree:
         np.random.seed(42)  # For reproducibility; remove this line for true randomness
         group_colors = np.random.choice(colors, size=len(self.branch_groups), replace=True)
 
-        for group_index, group in enumerate(self.branch_groups):
-            for start, end, btype, diameter, branch_color in group:
-                linewidth = max(0.5, diameter * 2.0)
-                
-                # Choose color based on mode
-                if use_branch_colors:
-                    plot_color = branch_color_map.get(branch_color, 'gray')
-                else:
-                    plot_color = group_colors[group_index]
-                
-                ax.plot(
-                    *zip(start, end),
-                    color=plot_color,
-                    linewidth=linewidth,
-                    alpha=0.9,
-                )
-                all_points.extend([start, end])
-
-        # Set plot limits to create a bounding box
-        pts = np.array(all_points)
+        # Flatten the groups into contiguous arrays once and draw a single
+        # Line3DCollection; the per-branch color still encodes the group
+        # (or branch color) membership.
+        flat = [
+            (branch, group_index)
+            for group_index, group in enumerate(self.branch_groups)
+            for branch in group
+        ]
+        starts = np.asarray([b[0] for b, _ in flat], dtype=np.float32)
+        ends = np.asarray([b[1] for b, _ in flat], dtype=np.float32)
+        diameters = np.asarray([b[3] for b, _ in flat], dtype=np.float32)
+        segments = np.stack([starts, ends], axis=1)
+        linewidths = np.maximum(0.5, diameters * 2.0)
+        if use_branch_colors:
+            plot_colors = [branch_color_map.get(b[4], 'gray') for b, _ in flat]
+        else:
+            plot_colors = [group_colors[group_index] for _, group_index in flat]
+
+        ax.add_collection3d(
+            Line3DCollection(
+                segments, colors=plot_colors, linewidths=linewidths, alpha=0.9
+            )
+        )
+
+        # Set plot limits to create a bounding box (keep the origin in it,
+        # as before)
+        pts = np.vstack([segments.reshape(-1, 3), np.zeros((1, 3), dtype=np.float32)])
         max_range = (pts.max(axis=0) - pts.min(axis=0)).max() / 2.0
         mid = (pts.max(axis=0) + pts.min(axis=0)) / 2.0
         ax.set_xlim(mid[0] - max_range, mid[0] + max_range)
@@ -1,4 +1,5 @@
 import json
+import multiprocessing
 import sys
 import os
 import numpy as np
@@ -10,15 +11,18 @@ from algorithm.lsystem import LSystem
 from algorithm.lsystem_tree import LSystemTree
 from utils.constants import ZONO_TREE
 
-np.random.seed(0)
-
 num_worlds = 100
 plant = ZONO_TREE
 
-for i in range(0,num_worlds):
+
+def gen_world(i: int) -> None:
+    # Seed per world index so each world is reproducible on its own and
+    # independent of which worker process picks it up.
+    np.random.seed(i)
+
     name, axiom, rule = plant
     lsystem = LSystem(axiom=axiom, rule=rule)
-    
+
     batches = False
 
     if plant == ZONO_TREE:
@@ -26,8 +30,8 @@ for i in range(0,num_worlds):
         remove_a_string = True
         branch_length = 0.2
         angle = 22.5
-        initial_diameter = 0.10 
-        diameter_scale = 0.9 
+        initial_diameter = 0.10
+        diameter_scale = 0.9
         num_batches = 1
 
     lsystem.iterate(iterations=iterations)
@@ -59,8 +63,8 @@ for i in range(0,num_worlds):
     # Handle batched trees (list of branch lists)
     for tree_idx, tree_branches in enumerate(all_trees_list):
         print(f"Tree {tree_idx + 1}: {len(tree_branches)} branches")
-        
-        
+
+
         # Create lists for the current batch
         b_start, b_end, b_type, b_diameter, b_color = [], [], [], [], []
 
@@ -70,7 +74,7 @@ for i in range(0,num_worlds):
             b_type.append(btype)
             b_diameter.append(diameter)
             b_color.append(color)
-        
+
         # Append the dictionary for the current batch
         all_batches_data.append({
             "start": b_start,
@@ -80,25 +84,25 @@ for i in range(0,num_worlds):
             "color": b_color,
         })
         all_branch_length_data.append(len(tree_branches))
-    
+
     # Process the grouped branches
     for tree_idx, tree_grouped_branches in enumerate(all_trees_grouped):
         print(f"Tree {tree_idx + 1}: {len(tree_grouped_branches)} branch groups")
-        
+
         # Create a list of groups for this tree
         tree_groups = []
-        
+
         for group_idx, group in enumerate(tree_grouped_branches):
             # Create lists for the current group
             g_start, g_end, g_type, g_diameter, g_color = [], [], [], [], []
-            
+
             for start, end, btype, diameter, color in group:
                 g_start.append(start.tolist())
                 g_end.append(end.tolist())
                 g_type.append(btype)
                 g_diameter.append(diameter)
                 g_color.append(color)
-            
+
             # Append the dictionary for this group
             tree_groups.append({
                 "start": g_start,
@@ -107,10 +111,10 @@ for i in range(0,num_worlds):
                 "diameter": g_diameter,
                 "color": g_color,
             })
-        
+
         # Add this tree's grouped data
         all_batches_grouped_data.append(tree_groups)
-        
+
     # estimated_groups = lsystem.estimate_branch_groups(string)
     # print(f"Estimated groups: {estimated_groups}")
 
@@ -132,5 +136,12 @@ for i in range(0,num_worlds):
 
     with open(f"results/trees/worlds_color/lsystem_{i}_{name}.json", "w") as f:
         json.dump(stats, f, indent=2)
-        
+
     print(f"Saved to: results/trees/worlds_color/lsystem_{i}_{name}.json")
+
+
+if __name__ == "__main__":
+    # Worlds are independent of each other, so spread them across one
+    # process per core instead of generating them sequentially.
+    with multiprocessing.Pool() as pool:
+        pool.map(gen_world, range(num_worlds))
@@ -1,6 +1,21 @@
+import sys
+
+import numpy as np
+
 from utils.axiom import Axiom
 from utils.rule import Rule
 
+
+def _freeze(rules):
+    """Freezes a rule table at import time: interned predecessor strings
+    (pointer-comparable when grouping) plus a float64 chance array, so each
+    Rule(...) construction is a cast instead of per-rule parsing."""
+    return (
+        tuple(sys.intern(rule[0]) for rule in rules),
+        tuple(rule[1] for rule in rules),
+        np.array([rule[2] for rule in rules], dtype=np.float64),
+    )
+
 """
 L-SYSTEM SYMBOL DEFINITIONS
 
@@ -26,18 +41,18 @@ Constants (delta = __ degrees):
 BASIC_EXAMPLE = [
     "Basic Example",
     Axiom("FR"),
-    Rule([["F", "FRF", 1.0], ["F", "FFFR", 0.0]]),
+    Rule(_freeze([["F", "FRF", 1.0], ["F", "FFFR", 0.0]])),
 ]
 
 TREE_EXAMPLE = [
     "Tree Example",
     Axiom("X"),
     Rule(
-        [
+        _freeze([
             ["X", "F-[[X]+X]+F[+FX]-X", 0.5],
             ["X", "F-[[X]+X]+F[+FX]-X", 0.5],
             ["F", "FF", 1.0],
-        ]
+        ])
     ),
 ]
 
@@ -118,7 +133,7 @@ BUSH_3D = [
     "bush_3d",
     Axiom("A"),  # ω : A
     Rule(
-        [
+        _freeze([
             # p₁: A → [&FL!A]/////'[&FL!A]////////'[&FL!A]
             # This creates three main branches with different roll orientations
             ["A", "[&FL!A]/////'[&FL!A]////////'[&FL!A]", 1.0],
@@ -134,7 +149,7 @@ BUSH_3D = [
             # p₄: L → [''^∧∧{-f+f+f-|-f+f+f}]
             # Leaves create detailed polygonal structures
             ["L", "[''^∧∧{-C+C+C-|-C+C+C}]", 1.0],
-        ]
+        ])
     ),
 ]
 
@@ -142,7 +157,7 @@ REALISTIC_TREE = [
     "realistic_tree", 
     Axiom("T"),  # Start with trunk like ZONO_TREE
     Rule(
-        [
+        _freeze([
             # Initial trunk rule - creates visible trunk before branching
             ["T", "IIIIIIIA", 1.0],  # Draw trunk then start main growth
             
@@ -165,7 +180,7 @@ REALISTIC_TREE = [
             
             # Leaf detail segments
             ["C", "C", 1.0],  # Leaf details are stable
-        ]
+        ])
     ),
 ]
 
@@ -173,7 +188,7 @@ ZONO_TREE = [
     "zono_tree",
     Axiom("T"),  # ω : A
     Rule(
-        [
+        _freeze([
             # Initial trunk rule - creates visible trunk before branching
             ["T", "III!IIII!IIII!IIII!!!B", 1.0],  # Draw trunk then start main growth
             
@@ -199,7 +214,7 @@ ZONO_TREE = [
             # p₄: L → [''^∧∧{-f+f+f-|-f+f+f}]
             # Leaves create detailed polygonal structures
             # ["L", "[!!''^∧∧{-C+C+C-|-C+C+C}]", 1.0],
-        ]
+        ])
     ),
 ]
 
@@ -207,7 +222,7 @@ ZONO_TREE_SPARSE = [
     "zono_tree_sparse",
     Axiom("T"),  # ω : A
     Rule(
-        [
+        _freeze([
             # Initial trunk rule - creates visible trunk before branching
             ["T", "III!IIII!IIII!IIII!!!B", 1.0],  # Draw trunk then start main growth
             
@@ -241,7 +256,7 @@ ZONO_TREE_SPARSE = [
             # p₄: L → [''^∧∧{-f+f+f-|-f+f+f}]
             # Leaves create detailed polygonal structures
             # ["L", "[!!''^∧∧{-C+C+C-|-C+C+C}]", 1.0],
-        ]
+        ])
     ),
 ]
 
@@ -250,7 +265,7 @@ PLANT_SYSTEM = [
     "plant_system",
     Axiom("A"),  # ω: plant (using A for plant/apex)
     Rule(
-        [
+        _freeze([
             # p₁: plant → internode + [ plant + flower ] - - // [ - - leaf ] internode [ + + leaf ] - [ plant flower ] + + plant flower
             # Mapping: plant→A, internode→F, flower→W, leaf→L
             ["A", "F+[A+W]--//[--L]F[++L]-[AW]++AW", 1.0],
@@ -280,7 +295,7 @@ PLANT_SYSTEM = [
             
             # Make C stable for leaf details
             ["C", "C", 1.0],
-        ]
+        ])
     ),
 ]
 
@@ -288,13 +303,13 @@ SETH_TREE = [
     "seth_tree",
     Axiom("F"),  # Start with a forward segment
     Rule(
-        [
+        _freeze([
             # Original: F → FFv[!vF^F^F]([!(F)F)F]^[!^FvFvF])[!)F(F(F]
             # Converted: v→&, (→\, )→/
             ["F", "FF&[!&F^F^F]\\[!\\F/F/F]^[!^F&F&F]/[!/F\\F\\F]", 1.0],
             
             # Simplification rule: FF → F
             ["FF", "F", 1.0],
-        ]
+        ])
     ),
 ]
@@ -1,20 +1,255 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from utils.rule_numba import HAVE_NUMBA, derive
+
+
 class Rule:
+    """
+    Production rule table for an L-system, stored column-wise.
+
+    The rules are kept as three parallel columns (symbols, new_symbols,
+    chances) instead of one dict per rule, plus a per-symbol lookup table
+    with precomputed cumulative probabilities so a stochastic choice is a
+    single searchsorted instead of a scan over every rule.
+    """
+
     def __init__(
         self,
-        input_rules: list[list[str | float]]
+        input_rules: list[list[str | float]] | tuple[tuple[str, ...], tuple[str, ...], np.ndarray]
     ) -> None:
-        self.list = self.process_rules(input_rules=input_rules)
-        
-        
-    def process_rules(self, input_rules: list[list[str | float]]):
-        processed_rules = []
-        
-        for i in range(len(input_rules)):
-            processed_rules.append({
-                "symbol": input_rules[i][0],
-                "new_symbol": input_rules[i][1],
-                "chance": input_rules[i][2],
-            })
-            
-        return processed_rules
-            
\ No newline at end of file
+        # Accept either the original list of [symbol, new_symbol, chance]
+        # rows or an already-frozen (symbols, new_symbols, chances) triple
+        # as produced by constants._freeze - the latter skips per-rule
+        # parsing entirely.
+        if (
+            isinstance(input_rules, tuple)
+            and len(input_rules) == 3
+            and isinstance(input_rules[2], np.ndarray)
+        ):
+            symbols, new_symbols, chances = input_rules
+            self.symbols: tuple[str, ...] = tuple(symbols)
+            self.new_symbols: tuple[str, ...] = tuple(new_symbols)
+            self.chances: np.ndarray = np.asarray(chances, dtype=np.float64)
+        else:
+            self.symbols = tuple(r[0] for r in input_rules)
+            self.new_symbols = tuple(r[1] for r in input_rules)
+            self.chances = np.array(
+                [r[2] for r in input_rules], dtype=np.float64
+            )
+
+        # Normalize the table: merge duplicate (symbol, new_symbol) entries
+        # by summing their chances, drop entries that can never fire, and
+        # stable-sort by symbol so rules sharing a predecessor sit in one
+        # contiguous slice. Within a predecessor the original order (and
+        # hence the cumulative-chance chain) is preserved.
+        merged: dict[tuple[str, str], float] = {}
+        for symbol, new_symbol, chance in zip(
+            self.symbols, self.new_symbols, self.chances
+        ):
+            key = (symbol, new_symbol)
+            merged[key] = merged.get(key, 0.0) + float(chance)
+        rows = sorted(
+            (
+                (symbol, new_symbol, chance)
+                for (symbol, new_symbol), chance in merged.items()
+                if chance > 0.0
+            ),
+            key=lambda row: row[0],
+        )
+        self.symbols = tuple(row[0] for row in rows)
+        self.new_symbols = tuple(row[1] for row in rows)
+        self.chances = np.array([row[2] for row in rows], dtype=np.float64)
+
+        # Group the columns by predecessor symbol: for each symbol keep the
+        # original rule indices, the running cumulative chances, and the
+        # successor strings, in table order.
+        grouped: dict[str, list[int]] = defaultdict(list)
+        for i, symbol in enumerate(self.symbols):
+            grouped[symbol].append(i)
+
+        self.by_symbol: dict[str, tuple[tuple[int, ...], np.ndarray, tuple[str, ...]]] = {}
+        for symbol, indices in grouped.items():
+            self.by_symbol[symbol] = (
+                tuple(indices),
+                np.cumsum(self.chances[indices]),
+                tuple(self.new_symbols[i] for i in indices),
+            )
+
+        # Row-wise dict view of the same table, kept for consumers that
+        # still iterate rule-by-rule (LSystem's matcher construction).
+        self.list = [
+            {"symbol": symbol, "new_symbol": new_symbol, "chance": float(chance)}
+            for symbol, new_symbol, chance in zip(
+                self.symbols, self.new_symbols, self.chances
+            )
+        ]
+        self._compiled = None
+        self._code_tables = None
+
+    def compile(self):
+        """
+        Compiles the table into a single-pass rewriter for one generation.
+
+        Returns ("translate", table) when every predecessor is a single
+        character with exactly one always-firing rule - the whole generation
+        is then one str.translate call. Otherwise returns ("regex", pattern,
+        repl_fn): the pattern is an alternation of the predecessors sorted
+        longest-first (so longer predecessors win, like the trie matcher),
+        and repl_fn samples among each match's successors from the
+        precomputed cumulative chances. Either way the per-symbol loop runs
+        inside CPython's C engine, not in Python. The result is cached.
+        """
+        if self._compiled is not None:
+            return self._compiled
+
+        deterministic = all(
+            len(symbol) == 1
+            and len(entry[2]) == 1
+            and entry[1][-1] >= 1.0
+            for symbol, entry in self.by_symbol.items()
+        )
+        if deterministic:
+            table = str.maketrans(
+                {symbol: entry[2][0] for symbol, entry in self.by_symbol.items()}
+            )
+            self._compiled = ("translate", table)
+            return self._compiled
+
+        pattern = re.compile(
+            "|".join(
+                re.escape(symbol)
+                for symbol in sorted(self.by_symbol, key=len, reverse=True)
+            )
+        )
+
+        def repl_fn(match: re.Match) -> str:
+            symbol = match.group(0)
+            new_symbol = self.sample(symbol, np.random.random())
+            return new_symbol if new_symbol is not None else symbol
+
+        self._compiled = ("regex", pattern, repl_fn)
+        return self._compiled
+
+    def apply(self, state: str) -> str:
+        """
+        Runs one derivation pass over `state` and returns the next one.
+
+        Deterministic tables go through the compiled str.translate call and
+        multi-character predecessors through the compiled regex. For the
+        common single-character stochastic case the uniform draws are
+        batched with one np.random.random(len(state)) call and successors
+        are appended to a bytearray (ASCII) or a list joined at the end -
+        amortized O(n) instead of the O(n^2) of string concatenation.
+        """
+        compiled = self.compile()
+        if compiled[0] == "translate":
+            return state.translate(compiled[1])
+        if any(len(symbol) != 1 for symbol in self.by_symbol):
+            return compiled[1].sub(compiled[2], state)
+
+        randoms = np.random.random(len(state))
+        ascii_table = all(ord(symbol) < 128 for symbol in self.by_symbol) and all(
+            ns.isascii() for ns in self.new_symbols
+        )
+
+        if HAVE_NUMBA and ascii_table and state.isascii():
+            codes = np.frombuffer(state.encode("ascii"), dtype=np.uint8)
+            _, _, rhs_start, rhs_len, rhs_flat = self._build_code_tables()
+            choice_idx = self.sample_many(codes, randoms)
+            out = derive(codes, choice_idx, rhs_start, rhs_len, rhs_flat)
+            return out.tobytes().decode("ascii")
+
+        if ascii_table and state.isascii():
+            out = bytearray()
+            for i, symbol in enumerate(state):
+                new_symbol = self.sample(symbol, randoms[i])
+                out.extend(
+                    (new_symbol if new_symbol is not None else symbol).encode("ascii")
+                )
+            return out.decode("ascii")
+
+        parts = []
+        for i, symbol in enumerate(state):
+            new_symbol = self.sample(symbol, randoms[i])
+            parts.append(new_symbol if new_symbol is not None else symbol)
+        return "".join(parts)
+
+    def sample_many(self, codes: np.ndarray, randoms: np.ndarray | None = None) -> np.ndarray:
+        """
+        Samples a rule choice for every position of a byte-coded state in
+        one vectorized pass: for each distinct predecessor byte, one
+        searchsorted of that byte's positions' draws against its cumulative
+        chances. Returns the global rule index per position, or -1 where
+        the symbol has no rules or the draw falls past the total chance
+        mass. Draws are positional (randoms[i] belongs to position i), so
+        results are seed-identical with per-symbol sample() calls; pass
+        `randoms` to reuse draws already taken for the generation.
+        """
+        if randoms is None:
+            randoms = np.random.random(len(codes))
+        cum_by_code, rule_ids_by_code, _, _, _ = self._build_code_tables()
+
+        choice_idx = np.full(len(codes), -1, dtype=np.int64)
+        for code, cum_chances in cum_by_code.items():
+            mask = codes == code
+            if not mask.any():
+                continue
+            picks = np.searchsorted(cum_chances, randoms[mask], side="left")
+            hit = picks < len(cum_chances)
+            choice_idx[mask] = np.where(
+                hit,
+                rule_ids_by_code[code][np.minimum(picks, len(cum_chances) - 1)],
+                -1,
+            )
+        return choice_idx
+
+    def _build_code_tables(self):
+        """
+        Builds (and caches) the byte-coded tables for the numba kernel:
+        per-byte cumulative chances and global rule indices, plus the
+        successor strings flattened into one uint8 array with start/length
+        slices per rule. Only valid for all-ASCII single-character tables;
+        apply() checks that before calling.
+        """
+        if self._code_tables is None:
+            cum_by_code = {}
+            rule_ids_by_code = {}
+            for symbol, (indices, cum_chances, _) in self.by_symbol.items():
+                cum_by_code[ord(symbol)] = cum_chances
+                rule_ids_by_code[ord(symbol)] = np.array(indices, dtype=np.int64)
+
+            rhs_encoded = [ns.encode("ascii") for ns in self.new_symbols]
+            rhs_len = np.array([len(rhs) for rhs in rhs_encoded], dtype=np.int64)
+            rhs_start = np.zeros(len(rhs_encoded), dtype=np.int64)
+            np.cumsum(rhs_len[:-1], out=rhs_start[1:])
+            rhs_flat = np.frombuffer(b"".join(rhs_encoded), dtype=np.uint8)
+
+            self._code_tables = (
+                cum_by_code,
+                rule_ids_by_code,
+                rhs_start,
+                rhs_len,
+                rhs_flat,
+            )
+        return self._code_tables
+
+    def sample(self, symbol: str, u: float) -> str | None:
+        """
+        Picks the successor for `symbol` given a uniform draw `u` in [0, 1).
+
+        Returns None when the symbol has no rules or the draw falls past the
+        total chance mass (the symbol is left unchanged). Callers can batch
+        the draws with one np.random.random(n) per generation and pass them
+        in one at a time.
+        """
+        entry = self.by_symbol.get(symbol)
+        if entry is None:
+            return None
+        _, cum_chances, new_strings = entry
+        choice = int(np.searchsorted(cum_chances, u, side="left"))
+        if choice >= len(new_strings):
+            return None
+        return new_strings[choice]
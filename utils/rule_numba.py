@@ -0,0 +1,65 @@
+"""
+Optional Numba-compiled derivation kernel for Rule.apply.
+
+The symbols are byte codes and the rule choices are presampled outside
+the kernel (one vectorized pass, see Rule), so the kernel itself is two
+branch-free passes over contiguous arrays: size up the output with a
+prefix sum of successor lengths, then copy each chosen successor into
+its slot. If numba is not installed, HAVE_NUMBA is False and Rule falls
+back to the pure-Python accumulator loop.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # No-op decorator so the module still imports without numba.
+        def wrap(func):
+            return func
+
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True)
+def derive(codes, choice_idx, rhs_start, rhs_len, rhs_flat):
+    """
+    One derivation pass over a uint8-coded state.
+
+    `choice_idx[i]` is the global rule index chosen for position i, or -1
+    when the symbol is copied through unchanged. Pass 1 computes each
+    position's output length and prefix-sums them into write offsets;
+    pass 2 copies the successor bytes (or the input byte) into the exactly
+    sized output array.
+    """
+    n = codes.shape[0]
+
+    out_lens = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        choice = choice_idx[i]
+        out_lens[i] = 1 if choice < 0 else rhs_len[choice]
+
+    offsets = np.empty(n + 1, dtype=np.int64)
+    offsets[0] = 0
+    for i in range(n):
+        offsets[i + 1] = offsets[i] + out_lens[i]
+
+    out = np.empty(offsets[n], dtype=np.uint8)
+    for i in range(n):
+        pos = offsets[i]
+        choice = choice_idx[i]
+        if choice < 0:
+            out[pos] = codes[i]
+        else:
+            start = rhs_start[choice]
+            for k in range(rhs_len[choice]):
+                out[pos + k] = rhs_flat[start + k]
+
+    return out
@@ -10,7 +10,15 @@ import json
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+from matplotlib.colors import to_rgba
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+# orjson parses large tree JSONs several times faster than the stdlib
+# parser; fall back to json if it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def visualize_tree_from_json(
@@ -37,74 +45,74 @@ def visualize_tree_from_json(
     fig = plt.figure(figsize=figsize)
     ax = fig.add_subplot(111, projection="3d")
 
-    # 3. Consolidate all branches from single or batched data
-    all_branches = []
-    
-    if "batches" in tree_data:
-        print(f"Visualizing '{name}' with {len(tree_data['batches'])} batches...")
-        for batch in tree_data["batches"]:
-            # Ensure the diameter key exists for each batch
-            if "diameter" not in batch:
-                raise KeyError(
-                    f"Required field 'diameter' missing from a batch in {json_file_path}"
-                )
-            # Combine all branch attributes into one list
-            batch_branches = list(
-                zip(batch["start"], batch["end"], batch["btype"], batch["diameter"])
-            )
-            all_branches.extend(batch_branches)
-    else:  # Fallback for old, non-batched format
+    # 3. The loader already consolidated both formats (and the .npz cache)
+    # into the same contiguous arrays plus int8 branch-type codes.
+    num_batches = tree_data.get("num_batches")
+    if num_batches:
+        print(f"Visualizing '{name}' with {num_batches} batches...")
+    else:  # Old, non-batched format
         print(f"Visualizing single tree '{name}'...")
-        if "diameter" not in tree_data:
-            raise KeyError(f"Required field 'diameter' missing from {json_file_path}")
-        all_branches = list(
-            zip(
-                tree_data["start"],
-                tree_data["end"],
-                tree_data["btype"],
-                tree_data["diameter"],
-            )
-        )
-        
-    all_diameters = np.array([branch[3] for branch in all_branches])
+
+    starts = tree_data["start_arr"]
+    ends = tree_data["end_arr"]
+    all_diameters = tree_data["diameter_arr"]
     min_diam = np.min(all_diameters)
     max_diam = np.max(all_diameters)
 
     MIN_LINEWIDTH = 1.0
     MAX_LINEWIDTH = 15.0
 
-    # 4. Plotting logic from your class method
-    all_points = [np.array([0.0, 0.0, 0.0])]
-    print(f"Total branches to render: {len(all_branches)}")
-    for start, end, btype, diameter in all_branches:
-        start, end = np.array(start), np.array(end)
-        
-        # linewidth = diameter
-        
-        # Avoid division by zero if all diameters are the same
-        if (max_diam - min_diam) > 0:
-            norm_diam = (diameter - min_diam) / (max_diam - min_diam)
-            linewidth = MIN_LINEWIDTH + norm_diam * (MAX_LINEWIDTH - MIN_LINEWIDTH)
-        else:
-            linewidth = MIN_LINEWIDTH # Assign a default if all are same size
-        
-        ax.plot(
-            *zip(start, end),
-            color=branch_colors.get(btype, branch_colors["default"]),
-            linewidth=linewidth,
+    # 4. Build one Line3DCollection for all branches instead of an ax.plot
+    # call (one artist, one transform pass) per branch - the per-call
+    # matplotlib overhead dominates for large trees.
+    print(f"Total branches to render: {len(starts)}")
+    segments = np.stack([starts, ends], axis=1)
+
+    # Linewidth is an affine function of diameter, so compute it for all
+    # branches in one elementwise expression.
+    diam_range = max_diam - min_diam
+    if diam_range > 0:
+        linewidths = MIN_LINEWIDTH + (all_diameters - min_diam) / diam_range * (
+            MAX_LINEWIDTH - MIN_LINEWIDTH
         )
-        all_points.extend([start, end])
-
-    # 5. Set plot limits to create a cubic bounding box
-    # if len(all_points) > 1:
-    #     pts = np.array(all_points)
-    #     max_range = (pts.max(axis=0) - pts.min(axis=0)).max() / 2.0
-    #     mid = (pts.max(axis=0) + pts.min(axis=0)) / 2.0
-    #     if max_range == 0:
-    #         max_range = 1.0  # Add a buffer for single-point trees
-    #     ax.set_xlim(mid[0] - max_range, mid[0] + max_range)
-    #     ax.set_ylim(mid[1] - max_range, mid[1] + max_range)
-    #     ax.set_zlim(mid[2] - max_range, mid[2] + max_range)
+    else:  # All diameters are the same; assign a default
+        linewidths = np.full_like(all_diameters, MIN_LINEWIDTH)
+
+    # One RGBA row per vocabulary entry, then a single gather over the code
+    # array - no per-branch dict lookup or color-name parsing.
+    color_lut = np.array(
+        [
+            to_rgba(branch_colors.get(btype, branch_colors["default"]))
+            for btype in tree_data["btype_vocab"]
+        ],
+        dtype=np.float32,
+    )
+    colors = color_lut[tree_data["btype_codes"]]
+
+    lc = Line3DCollection(segments, colors=colors, linewidths=linewidths)
+    ax.add_collection3d(lc)
+
+    # Dragging the view normally redraws every artist (axes panes, ticks,
+    # labels) through the full pipeline on each motion event. When the
+    # backend supports blitting, repaint just the collection over the
+    # cached canvas instead; the colors are already precomputed RGBA rows,
+    # so no color parsing happens per frame either.
+    def _on_move(event):
+        if event.inaxes is ax and fig.canvas.supports_blit:
+            ax.draw_artist(lc)
+            fig.canvas.blit(ax.bbox)
+
+    fig.canvas.mpl_connect("motion_notify_event", _on_move)
+
+    # 5. Scale the axes once from the segment endpoints (collections do not
+    # autoscale 3D axes on their own). One min and one max reduction over
+    # the segments array already in hand - no stacked copy of the points.
+    points = segments.reshape(-1, 3)
+    lo = points.min(axis=0)
+    hi = points.max(axis=0)
+    ax.set_xlim(lo[0], hi[0])
+    ax.set_ylim(lo[1], hi[1])
+    ax.set_zlim(lo[2], hi[2])
 
     # 6. Finalize and show the plot
     ax.set_xlabel("X")
@@ -118,12 +126,39 @@ def visualize_tree_from_json(
 
 
 def load_tree_data(json_file_path):
-    """Loads and validates tree data from a JSON file, supporting both single and batched formats."""
+    """Loads and validates tree data from a JSON file, supporting both single and batched formats.
+
+    The consolidated arrays are cached next to the JSON as an .npz plus a
+    small .meta.json sidecar; repeat loads read the binary arrays directly
+    and skip JSON parsing entirely. The cache is refreshed whenever the
+    JSON is newer than it.
+    """
     if not os.path.exists(json_file_path):
         raise FileNotFoundError(f"JSON file not found: {json_file_path}")
 
-    with open(json_file_path, "r") as f:
-        data = json.load(f)
+    cache_path = json_file_path + ".npz"
+    meta_path = json_file_path + ".meta.json"
+    if (
+        os.path.exists(cache_path)
+        and os.path.exists(meta_path)
+        and os.path.getmtime(cache_path) >= os.path.getmtime(json_file_path)
+    ):
+        arrays = np.load(cache_path)
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        return {
+            "name": meta["name"],
+            "num_batches": meta["num_batches"],
+            "start_arr": arrays["start"],
+            "end_arr": arrays["end"],
+            "diameter_arr": arrays["diameter"],
+            "btype_codes": arrays["btype_codes"],
+            "btype_vocab": meta["btype_vocab"],
+        }
+
+    with open(json_file_path, "rb") as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     # All formats must have a 'name'
     if "name" not in data:
@@ -131,6 +166,28 @@ def load_tree_data(json_file_path):
 
     # If 'batches' key exists, it's the new format. This is a sufficient check.
     if "batches" in data:
+        batches = data["batches"]
+        for batch in batches:
+            if "diameter" not in batch:
+                raise KeyError(
+                    f"Required field 'diameter' missing from a batch in {json_file_path}"
+                )
+        # Consolidate the batches into contiguous float32 arrays once, so
+        # the plotting code consumes ndarrays directly instead of
+        # re-converting nested lists per branch.
+        data["start_arr"] = np.concatenate(
+            [np.asarray(batch["start"], dtype=np.float32) for batch in batches]
+        )
+        data["end_arr"] = np.concatenate(
+            [np.asarray(batch["end"], dtype=np.float32) for batch in batches]
+        )
+        data["diameter_arr"] = np.concatenate(
+            [np.asarray(batch["diameter"], dtype=np.float32) for batch in batches]
+        )
+        data["btype_codes"], data["btype_vocab"] = _encode_btypes(
+            [btype for batch in batches for btype in batch["btype"]]
+        )
+        _write_tree_cache(cache_path, meta_path, data, num_batches=len(batches))
         return data
 
     # Otherwise, assume it's the old format and validate its required fields.
@@ -140,16 +197,74 @@ def load_tree_data(json_file_path):
                 raise KeyError(f"Required field '{field}' missing from JSON file")
         if not (len(data["start"]) == len(data["end"]) == len(data["btype"])):
             raise ValueError("Inconsistent data lengths in JSON file.")
+        if "diameter" not in data:
+            raise KeyError(f"Required field 'diameter' missing from {json_file_path}")
+        data["start_arr"] = np.asarray(data["start"], dtype=np.float32)
+        data["end_arr"] = np.asarray(data["end"], dtype=np.float32)
+        data["diameter_arr"] = np.asarray(data["diameter"], dtype=np.float32)
+        data["btype_codes"], data["btype_vocab"] = _encode_btypes(data["btype"])
+        _write_tree_cache(cache_path, meta_path, data, num_batches=None)
         return data
 
 
+def _encode_btypes(btypes):
+    """Encodes a branch-type string list as int8 codes plus a vocabulary.
+
+    Downstream lookups (colors, grouping) then become a single array gather
+    into a per-vocabulary-entry table instead of one dict lookup per branch.
+    """
+    vocab = sorted(set(btypes))
+    code_of = {btype: code for code, btype in enumerate(vocab)}
+    codes = np.fromiter(
+        (code_of[btype] for btype in btypes), dtype=np.int8, count=len(btypes)
+    )
+    return codes, vocab
+
+
+def _write_tree_cache(cache_path, meta_path, data, num_batches):
+    """Saves the consolidated arrays as .npz plus a .meta.json sidecar.
+
+    Branch types are stored as small-int codes into a vocabulary kept in the
+    sidecar, so the .npz holds only numeric arrays. Cache write failures are
+    non-fatal; the caller already has the parsed data in hand.
+    """
+    try:
+        np.savez(
+            cache_path,
+            start=data["start_arr"],
+            end=data["end_arr"],
+            diameter=data["diameter_arr"],
+            btype_codes=data["btype_codes"],
+        )
+        with open(meta_path, "w") as f:
+            json.dump(
+                {
+                    "name": data["name"],
+                    "num_batches": num_batches,
+                    "btype_vocab": data["btype_vocab"],
+                },
+                f,
+            )
+    except OSError as e:
+        print(f"Warning: could not write tree cache next to {cache_path}: {e}")
+
+
 def list_available_trees(trees_dir="results/trees"):
     """Lists available tree JSON files in a directory."""
     if not os.path.isdir(trees_dir):
         print(f"Warning: Trees directory not found at '{trees_dir}'")
         return []
-    json_files = sorted([f for f in os.listdir(trees_dir) if f.endswith(".json")])
-    return [os.path.join(trees_dir, f) for f in json_files]
+    # scandir reuses the stat information from the directory read, so the
+    # is_file check costs no extra stat call per entry. Cache sidecars are
+    # not trees, so skip them.
+    with os.scandir(trees_dir) as entries:
+        return sorted(
+            os.path.join(trees_dir, entry.name)
+            for entry in entries
+            if entry.is_file()
+            and entry.name.endswith(".json")
+            and not entry.name.endswith(".meta.json")
+        )
 
 
 def run_visualization_cli(trees_dir="results/trees"):
@@ -24,27 +24,35 @@ def main():
     generators = torch.tensor([[0.5, 0.0], [0.0, 0.3], [0.2, 0.1]], dtype=dtype, device=device)
     Z = torch.vstack([center, generators])  # Shape: [4, 2] = [center + 3 generators, 2D]
     
-    # Get center find vectors for cylinder base
-    a = torch.tensor(start-end)
+    # Get center and basis vectors for cylinder base
+    start = torch.tensor([0.0, 0.0, 0.0], dtype=dtype, device=device)
+    end = torch.tensor([0.0, 0.0, 4.0], dtype=dtype, device=device)
+    a = start - end
     a_hat = a / torch.linalg.norm(a)
     center = a
+    # Reference axes created on the same device/dtype so the cross products
+    # do not trigger implicit transfers
     if (a[0] == 0 and a[1] == 0):
-        u = torch.cross(a, torch.tensor([1,0,0]))
+        u = torch.cross(a, torch.tensor([1.0, 0.0, 0.0], dtype=dtype, device=device), dim=0)
     else:
-        u = torch.cross(a, torch.tensor([0,0,1]))
-    
+        u = torch.cross(a, torch.tensor([0.0, 0.0, 1.0], dtype=dtype, device=device), dim=0)
+
     u_hat = u / torch.linalg.norm(u)
-    
-    v = torch.cross(a_hat, u_hat)
+
+    v = torch.cross(a_hat, u_hat, dim=0)
     v_hat = v / torch.linalg.norm(v)
-    
-    # Get generators for cylinder
-    Z = center
+
+    # Get generators for cylinder: all m angles at once instead of a
+    # vstack per generator (each vstack recopied the whole tensor), and
+    # sin on the v axis - cos on both axes collapses every generator onto
+    # a single line.
     radius = 5
     m = 10
-    for i in range(0, m):
-        generator = radius * (torch.cos(2*np.pi/m) * u_hat + torch.cos(2*np.pi/m)*v_hat)
-        Z = torch.vstack([Z, generator])
-    
-    
+    theta = torch.arange(m, dtype=dtype, device=device) * (2 * np.pi / m)
+    generators = radius * (
+        torch.cos(theta)[:, None] * u_hat + torch.sin(theta)[:, None] * v_hat
+    )
+    Z = torch.cat([center[None], generators], dim=0)
+
+
     zono1 = zonotope(Z, dtype=dtype, device=device)
\ No newline at end of file